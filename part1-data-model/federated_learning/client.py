@@ -11,8 +11,47 @@ class HealthRiskClient(fl.client.Client):
         self.train_loader = train_loader
         self.val_loader = val_loader
         self.model = None
+        self._param_cache = (None, None)
         print(f"🟢 Client {cid} initialized with {len(train_loader)} batches")
     
+    def _decode_parameters(self, parameters):
+        """Decode server parameters, reusing the last result if unchanged"""
+        key = (parameters.tensor_type, tuple(parameters.tensors))
+        cached_key, cached_params = self._param_cache
+        if cached_key == key:
+            return cached_params
+        params = parameters_to_ndarrays(parameters)
+        self._param_cache = (key, params)
+        return params
+    
+    @staticmethod
+    def _collect(loader, verbose=False):
+        """Gather all samples of a loader into (X, y) numpy arrays"""
+        if hasattr(loader.dataset, 'as_numpy'):
+            # Dataset can hand over its arrays directly; skip batching
+            X_all, y_all = loader.dataset.as_numpy()
+            if verbose:
+                print(f"  Arrays: X shape={X_all.shape}, y shape={y_all.shape}")
+            return X_all, y_all
+        
+        n = len(loader.dataset)
+        X_sample, y_sample = loader.dataset[0]
+        X_all = np.empty((n, int(np.prod(X_sample.shape))), dtype=np.float32)
+        y_all = np.empty((n,) + tuple(y_sample.shape), dtype=y_sample.numpy().dtype)
+        
+        off = 0
+        for i, (X_batch, y_batch) in enumerate(loader):
+            if verbose and i == 0:  # Print first batch
+                print(f"  Batch {i}: X shape={X_batch.shape}, y shape={y_batch.shape}")
+            b = X_batch.shape[0]
+            # Batches from flatten_collate are already (b, -1) and contiguous,
+            # so this is a zero-copy view
+            X_all[off:off + b] = X_batch.reshape(b, -1).numpy()
+            y_all[off:off + b] = y_batch.numpy()
+            off += b
+        
+        return X_all[:off], y_all[:off]
+    
     def fit(self, ins):
         """Train on local data"""
         print(f"🔄 Client {self.cid} starting fit...")
@@ -23,7 +62,7 @@ class HealthRiskClient(fl.client.Client):
         
         # If server sent parameters, load them into local model
         try:
-            recv_params = parameters_to_ndarrays(ins.parameters)
+            recv_params = self._decode_parameters(ins.parameters)
             if recv_params is not None and len(recv_params) > 0:
                 print(f"⬇️ Client {self.cid} received {len(recv_params)} parameter arrays from server")
                 self.model.set_parameters(recv_params)
@@ -34,16 +73,7 @@ class HealthRiskClient(fl.client.Client):
         # Check if data exists
         print(f"📊 Client {self.cid} train_loader has {len(self.train_loader)} batches")
         
-        X_train, y_train = [], []
-        for i, (X_batch, y_batch) in enumerate(self.train_loader):
-            if i == 0:  # Print first batch
-                print(f"  Batch {i}: X shape={X_batch.shape}, y shape={y_batch.shape}")
-            X_train.append(X_batch.numpy().reshape(X_batch.shape[0], -1))
-            y_batch_np = y_batch.numpy()
-            y_train.append(y_batch_np)
-        
-        X_train = np.vstack(X_train)
-        y_train = np.concatenate(y_train)
+        X_train, y_train = self._collect(self.train_loader, verbose=True)
         
         print(f"✅ Client {self.cid} data loaded: X={X_train.shape}, y={y_train.shape}")
         
@@ -71,19 +101,13 @@ class HealthRiskClient(fl.client.Client):
             self.model = HealthRiskModel()
         # If server sent parameters before evaluation, set them
         try:
-            recv_params = parameters_to_ndarrays(ins.parameters)
+            recv_params = self._decode_parameters(ins.parameters)
             if recv_params is not None and len(recv_params) > 0:
                 self.model.set_parameters(recv_params)
         except Exception:  # nosec B110
             pass
         
-        X_val, y_val = [], []
-        for X_batch, y_batch in self.val_loader:
-            X_val.append(X_batch.numpy().reshape(X_batch.shape[0], -1))
-            y_val.append(y_batch.numpy())
-        
-        X_val = np.vstack(X_val)
-        y_val = np.concatenate(y_val)
+        X_val, y_val = self._collect(self.val_loader)
         
         y_pred = self.model.predict_proba(X_val)[:, 1]
         auc = roc_auc_score(y_val, y_pred)
@@ -2,11 +2,24 @@ import torch
 from torch.utils.data import Dataset, DataLoader
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+FEATURE_COLUMNS = [
+    'heart_rate', 'steps', 'sleep_hours', 'respiratory_rate', 'body_temp',
+    'pm25', 'pm10', 'o3', 'no2', 'temperature', 'humidity'
+]
+
+def flatten_collate(batch):
+    """Collate samples into a contiguous (B, sequence_length * n_features) batch"""
+    X = torch.stack([x for x, _ in batch]).reshape(len(batch), -1).contiguous()
+    y = torch.stack([y for _, y in batch])
+    return X, y
 
 class FederatedHealthDataset(Dataset):
     def __init__(self, health_df, env_df, sequence_length=24):
         self.data = self._merge_data(health_df, env_df)
         self.sequence_length = sequence_length
+        self._numpy = None
     
     def _merge_data(self, health_df, env_df):
         """Merge wearable and sensor data on node_id"""
@@ -27,13 +40,22 @@ class FederatedHealthDataset(Dataset):
     
     def __getitem__(self, idx):
         seq = self.data.iloc[idx:idx+self.sequence_length]
-        features = seq[[
-            'heart_rate', 'steps', 'sleep_hours', 'respiratory_rate', 'body_temp',
-            'pm25', 'pm10', 'o3', 'no2', 'temperature', 'humidity'
-        ]].values
+        features = seq[FEATURE_COLUMNS].values
         
         label = self.data.iloc[idx+self.sequence_length]['risk_score']
         return torch.FloatTensor(features), torch.LongTensor([label])
     
+    def as_numpy(self):
+        """Return all samples as flattened float32 X and int64 (N, 1) y
+        (cached), matching a stack of __getitem__ samples"""
+        if self._numpy is None:
+            n = len(self)
+            values = self.data[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+            windows = sliding_window_view(values, self.sequence_length, axis=0)[:n]
+            X = np.ascontiguousarray(windows.transpose(0, 2, 1)).reshape(n, -1)
+            y = self.data['risk_score'].to_numpy(dtype=np.int64)[self.sequence_length:].reshape(-1, 1)
+            self._numpy = (X, y)
+        return self._numpy
+    
     def get_dataloader(self, batch_size=32):
-        return DataLoader(self, batch_size=batch_size, shuffle=True)
\ No newline at end of file
+        return DataLoader(self, batch_size=batch_size, shuffle=True, collate_fn=flatten_collate)
\ No newline at end of file
@@ -9,10 +9,15 @@ from federated_learning.data_loader import FederatedHealthDataset
 from data_simulation.wearables import WearableSimulator
 from data_simulation.air_quality import EnvironmentalSimulator
 import flwr as fl
+from functools import lru_cache
+
+@lru_cache(maxsize=4)
+def get_simulators(num_patients=500, num_sensors=20):
+    """Build the data simulators once and share them across clients"""
+    return WearableSimulator(num_patients=num_patients), EnvironmentalSimulator(num_sensors=num_sensors)
 
 def create_client(cid: str):
-    wear_sim = WearableSimulator(num_patients=500)  # Increase from 50
-    env_sim = EnvironmentalSimulator(num_sensors=20)  # Increase from 5
+    wear_sim, env_sim = get_simulators(num_patients=500, num_sensors=20)  # Increased from 50 / 5
     
     health_data = wear_sim.generate_daily_data("2024-01-15", node_id=f"hospital_{cid}")
     env_data = env_sim.generate_sensor_data(node_id=f"hospital_{cid}")
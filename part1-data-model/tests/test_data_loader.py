@@ -0,0 +1,61 @@
+"""
+Tests for the federated dataset's direct NumPy path
+"""
+import sys
+import os
+
+# Add part1-data-model to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from federated_learning.data_loader import FederatedHealthDataset, flatten_collate
+
+
+def make_dataset(n_rows=30, sequence_length=4):
+    rng = np.random.default_rng(0)
+    health_df = pd.DataFrame({
+        'node_id': 'hospital_01',
+        'heart_rate': rng.normal(72, 8, n_rows),
+        'steps': rng.integers(0, 20000, n_rows),
+        'sleep_hours': rng.normal(7, 1, n_rows),
+        'respiratory_rate': rng.normal(16, 2, n_rows),
+        'body_temp': rng.normal(98.6, 0.5, n_rows),
+        'risk_score': rng.integers(0, 2, n_rows),
+    })
+    env_df = pd.DataFrame({
+        'node_id': 'hospital_01',
+        'pm25': rng.normal(12, 3, 5),
+        'pm10': rng.normal(20, 5, 5),
+        'o3': rng.normal(0.035, 0.01, 5),
+        'no2': rng.normal(18, 4, 5),
+        'temperature': rng.normal(70, 5, 5),
+        'humidity': rng.normal(55, 10, 5),
+    })
+    return FederatedHealthDataset(health_df, env_df, sequence_length=sequence_length)
+
+
+def test_as_numpy_matches_stacked_items():
+    ds = make_dataset()
+    X, y = ds.as_numpy()
+
+    items = [ds[i] for i in range(len(ds))]
+    expected_X = np.stack([x.numpy().reshape(-1) for x, _ in items])
+    expected_y = np.stack([label.numpy() for _, label in items])
+
+    np.testing.assert_equal(X.shape, expected_X.shape)
+    np.testing.assert_equal(X.dtype, np.float32)
+    np.testing.assert_array_equal(X, expected_X)
+    np.testing.assert_equal(y.shape, (len(ds), 1))
+    np.testing.assert_equal(expected_y.shape, (len(ds), 1))
+    np.testing.assert_array_equal(y, expected_y)
+
+
+def test_as_numpy_matches_dataloader_collect():
+    ds = make_dataset()
+    X, y = ds.as_numpy()
+    X_batch, y_batch = flatten_collate([ds[i] for i in range(len(ds))])
+
+    np.testing.assert_array_equal(X, X_batch.numpy())
+    np.testing.assert_array_equal(y, y_batch.numpy())
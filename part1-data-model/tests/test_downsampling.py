@@ -0,0 +1,82 @@
+"""
+Tests for the dashboards' LTTB plot downsampling
+"""
+import sys
+import os
+import math
+
+# Add part3-dashboard/dashboard to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../part3-dashboard/dashboard')))
+
+import numpy as np
+import pandas as pd
+
+from downsampling import lttb_indices, downsample
+
+
+def reference_lttb(x, y, threshold):
+    """Straightforward LTTB as published by Steinarsson (2013)"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    sampled = [0]
+    for i in range(threshold - 2):
+        avg_start = int(math.floor((i + 1) * every)) + 1
+        avg_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = sum(x[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+
+        range_start = int(math.floor(i * every)) + 1
+        range_end = int(math.floor((i + 1) * every)) + 1
+        max_area = -1.0
+        next_a = range_start
+        for j in range(range_start, range_end):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a])) * 0.5
+            if area > max_area:
+                max_area = area
+                next_a = j
+        sampled.append(next_a)
+        a = next_a
+    sampled.append(n - 1)
+    return sampled
+
+
+def test_lttb_indices_matches_reference():
+    rng = np.random.default_rng(0)
+    for n, n_out in [(1000, 100), (537, 50), (10, 3), (50, 49)]:
+        x = np.arange(n, dtype=float)
+        y = np.sin(x / 20) + rng.normal(0, 0.1, n)
+        np.testing.assert_array_equal(lttb_indices(x, y, n_out), reference_lttb(list(x), list(y), n_out))
+
+
+def test_lttb_indices_passthrough_when_small():
+    x = np.arange(10, dtype=float)
+    np.testing.assert_array_equal(lttb_indices(x, x, 20), np.arange(10))
+
+
+def test_downsample_caps_each_group():
+    rng = np.random.default_rng(1)
+    dates = pd.date_range('2024-01-01', periods=300, freq='h')
+    df = pd.DataFrame({
+        'date': np.tile(dates, 2),
+        'city': np.repeat(['Chicago', 'Phoenix'], 300),
+        'value': rng.random(600),
+    })
+
+    out = downsample(df, 'date', 'value', by='city', max_points=50)
+
+    np.testing.assert_equal(out.groupby('city').size().to_dict(), {'Chicago': 50, 'Phoenix': 50})
+    for city, group in out.groupby('city'):
+        source = df[df['city'] == city]
+        expected = source.index.to_numpy()[lttb_indices(
+            source['date'].to_numpy().view(np.int64).astype(float), source['value'].to_numpy(), 50
+        )]
+        np.testing.assert_array_equal(group.index.to_numpy(), expected)
+
+
+def test_downsample_returns_small_frames_unchanged():
+    df = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=10), 'value': np.arange(10.0)})
+    out = downsample(df, 'date', ['value'], max_points=50)
+    np.testing.assert_equal(out is df, True)
@@ -0,0 +1,50 @@
+"""
+Gunicorn configuration for the inference server
+Runs several Uvicorn workers that share one preloaded model
+"""
+import math
+import os
+import shutil
+
+# Load the model in the master before forking so workers share its pages
+os.environ.setdefault("MODEL_PRELOAD", "1")
+
+# Prometheus metrics are aggregated across workers through this directory.
+# It is reset here because the preloaded app creates its metrics before
+# any server hook runs; a directory supplied by the operator is left as-is.
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = "/tmp/prometheus_multiproc"  # nosec B108
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+def _available_cpus():
+    """CPUs this container may use: the cgroup CPU quota when one is set,
+    otherwise the CPUs in the process's affinity mask"""
+    cpus = len(os.sched_getaffinity(0))
+    quota = period = None
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: quota is -1 when unlimited
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = f.read().strip()
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = f.read().strip()
+        except OSError:
+            pass
+    if quota not in (None, "max", "-1") and period:
+        cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    return max(cpus, 1)
+
+bind = os.getenv("BIND", "0.0.0.0:8080")  # nosec B104
+workers = int(os.getenv("WEB_CONCURRENCY", _available_cpus() * 2 + 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+def child_exit(server, worker):
+    """Drop live-gauge files of workers that exited"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -2,14 +2,21 @@
 Model Inference Server using FastAPI
 Serves health risk predictions via REST API
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request
 from pydantic import BaseModel
 import numpy as np
+import anyio
+import joblib
 import mlflow
 import mlflow.sklearn
+import contextlib
+import itertools
 import os
+import threading
 from typing import List, Optional
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, generate_latest, multiprocess, CONTENT_TYPE_LATEST
+)
 from fastapi.responses import Response
 import sys
 
@@ -19,16 +26,53 @@ sys.path.insert(0, os.path.join(project_root, 'part1-data-model'))
 
 from models.health_risk_model import HealthRiskModel
 
+__all__ = [
+    "app",
+    "HealthData",
+    "PredictionResponse",
+    "load_model",
+    "prepare_model",
+    "predict_proba_fast",
+    "FEATURE_NAMES",
+]
+
 app = FastAPI(title="Health Risk Prediction API", version="1.0.0")
 
 # Prometheus metrics
 prediction_counter = Counter('predictions_total', 'Total number of predictions')
 prediction_latency = Histogram('prediction_latency_seconds', 'Prediction latency')
 
+# /predict observes latency for 1 in (SAMPLE_MASK + 1) requests; the
+# counter is always incremented
+SAMPLE_MASK = 15
+_req_id = itertools.count()
+
+def _sampled_latency_timer():
+    """Return the latency timer for sampled requests, a no-op otherwise"""
+    if next(_req_id) & SAMPLE_MASK == 0:
+        return prediction_latency.time()
+    return contextlib.nullcontext()
+
 # Model loading
 model = None
+model_ready = False
+app.state.model = None
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
 MODEL_VERSION = os.getenv("MODEL_VERSION", "latest")
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE", "/var/cache/healthrisk")
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "0") == "1"
+PREDICT_THREADS = int(os.getenv("PREDICT_THREADS", "40"))
+
+# Per-thread (1, 11) float32 feature buffer reused by /predict
+_feature_buffers = threading.local()
+
+def _get_feature_buffer():
+    """Return this thread's single-row feature buffer"""
+    buf = getattr(_feature_buffers, "buf", None)
+    if buf is None:
+        buf = np.empty((1, 11), dtype=np.float32)
+        _feature_buffers.buf = buf
+    return buf
 
 class HealthData(BaseModel):
     heart_rate: float
@@ -43,11 +87,30 @@ class HealthData(BaseModel):
     temperature: float
     humidity: float
 
+# Model input order; one float32 field per HealthData attribute
+FEATURE_NAMES = (
+    'heart_rate', 'steps', 'sleep_hours', 'respiratory_rate', 'body_temp',
+    'pm25', 'pm10', 'o3', 'no2', 'temperature', 'humidity'
+)
+FEATURE_DTYPE = np.dtype([(name, np.float32) for name in FEATURE_NAMES])
+
 class PredictionResponse(BaseModel):
     risk_score: float
     risk_probability: float
     prediction: str
 
+def load_health_risk_model(path):
+    """Load a HealthRiskModel artifact, memory-mapping its arrays when it
+    was written with joblib.dump(..., compress=0)"""
+    try:
+        loaded = joblib.load(path, mmap_mode='r')
+        if isinstance(loaded, HealthRiskModel):
+            return loaded
+    except Exception:  # nosec B110
+        # Not a joblib dump of the model object; use the model's own loader
+        pass
+    return HealthRiskModel.load(path)
+
 def load_model():
     """Load model from MLflow or local file"""
     global model
@@ -66,14 +129,33 @@ def load_model():
                 run_id = runs[0].info.run_id
                 exp_id = experiment.experiment_id
                 
+                # Try the node-local cache before downloading from MLflow
+                cache_path = os.path.join(MODEL_CACHE_DIR, f"{run_id}.pkl")
+                if os.path.exists(cache_path):
+                    try:
+                        model = load_health_risk_model(cache_path)
+                        print(f"Loaded full HealthRiskModel from cache: {cache_path}")
+                        return model
+                    except Exception as e0:
+                        print(f"Could not load cached model, downloading again: {e0}")
+                
                 # Try to load full HealthRiskModel from artifact using MLflow download
                 try:
                     import tempfile
-                    with tempfile.TemporaryDirectory() as tmpdir:
+                    try:
+                        os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+                        download_root = MODEL_CACHE_DIR
+                    except OSError:
+                        download_root = None  # Cache not writable, use system temp dir
+                    with tempfile.TemporaryDirectory(dir=download_root) as tmpdir:
                         # Download the full model artifact
                         artifact_path = client.download_artifacts(run_id, "model/health_risk_model.pkl", tmpdir)
                         if os.path.exists(artifact_path):
-                            model = HealthRiskModel.load(artifact_path)
+                            if download_root is not None:
+                                # Same filesystem, so the rename into the cache is atomic
+                                os.replace(artifact_path, cache_path)
+                                artifact_path = cache_path
+                            model = load_health_risk_model(artifact_path)
                             print(f"Loaded full HealthRiskModel from run: {run_id}")
                             return model
                 except Exception as e1:
@@ -82,7 +164,7 @@ def load_model():
                 # Fallback: Try direct file access
                 artifact_path = f"/mlruns/{exp_id}/{run_id}/artifacts/model/health_risk_model.pkl"
                 if os.path.exists(artifact_path):
-                    model = HealthRiskModel.load(artifact_path)
+                    model = load_health_risk_model(artifact_path)
                     print(f"Loaded full HealthRiskModel from: {artifact_path}")
                     return model
                 
@@ -109,7 +191,7 @@ def load_model():
         # Fallback to local model if exists
         model_path = os.getenv("MODEL_PATH", "/app/models/health_risk_model.pkl")
         if os.path.exists(model_path):
-            model = HealthRiskModel.load(model_path)
+            model = load_health_risk_model(model_path)
             print(f"Loaded model from local file: {model_path}")
         else:
             # Initialize empty model (will fail on prediction until trained)
@@ -118,52 +200,157 @@ def load_model():
     
     return model
 
+def _cast_to_float32(m):
+    """Cast fitted coefficients and scaler statistics to float32 once so
+    float32 inputs are not upcast on every prediction
+
+    Memory-mapped arrays are left alone: casting would replace them with
+    private heap copies. Artifacts written by train_model_simple.py are
+    already float32, and the fused affine path is float32 either way.
+    """
+    def cast(obj, attr):
+        value = getattr(obj, attr, None)
+        if value is not None and not isinstance(value, np.memmap):
+            setattr(obj, attr, value.astype(np.float32, copy=False))
+    
+    estimator = getattr(m, 'model', None)
+    for attr in ('coef_', 'intercept_'):
+        cast(estimator, attr)
+    scaler = getattr(m, 'scaler', None)
+    for attr in ('mean_', 'scale_'):
+        cast(scaler, attr)
+
+def _fuse_scaler(m):
+    """Fold the StandardScaler into the logistic-regression weights:
+    w' = w / scale, b' = b - sum(w * mean / scale)"""
+    m._w = None
+    m._b = None
+    estimator = getattr(m, 'model', None)
+    scaler = getattr(m, 'scaler', None)
+    coef = getattr(estimator, 'coef_', None)
+    intercept = getattr(estimator, 'intercept_', None)
+    scale = getattr(scaler, 'scale_', None)
+    if coef is None or intercept is None or scale is None:
+        return
+    # Only binary one-vs-rest models reduce to a single sigmoid
+    if coef.shape[0] != 1 or getattr(estimator, 'multi_class', 'auto') == 'multinomial':
+        return
+    mean = getattr(scaler, 'mean_', None)
+    if mean is None:
+        mean = np.zeros_like(scale)
+    m._w = (coef[0] / scale).astype(np.float32)
+    m._b = np.float32(intercept[0] - (coef[0] * (mean / scale)).sum())
+
+def predict_proba_fast(m, X):
+    """Return positive-class probabilities, using the fused affine
+    transform when available"""
+    w = getattr(m, '_w', None)
+    if w is None:
+        return m.predict_proba(X)[:, 1]
+    return 1.0 / (1.0 + np.exp(-(X @ w + m._b)))
+
+# Risk level bucket boundaries: [0, 0.3) low, [0.3, 0.7) medium, [0.7, 1] high
+_BINS = np.array([0.3, 0.7])
+_LABELS = np.array(["low", "medium", "high"])
+
+def _risk_levels(probs):
+    """Map an array of probabilities to risk level labels"""
+    return _LABELS[np.searchsorted(_BINS, probs, side="right")]
+
+def _warm_up(m, rounds=5):
+    """Run dummy batch and single-row predictions through the serving path
+    so the first real requests hit warm code paths"""
+    warm_X = np.zeros((32, len(FEATURE_NAMES)), dtype=np.float32)
+    try:
+        for _ in range(rounds):
+            m.predict_proba(warm_X)
+            predict_proba_fast(m, warm_X)
+        predict_proba_fast(m, warm_X[:1])
+    except Exception as e:
+        print(f"Model warm-up failed: {e}")
+
+def prepare_model():
+    """Load the model and validate it once, outside the request path"""
+    global model_ready
+    load_model()
+    _cast_to_float32(model)
+    _fuse_scaler(model)
+    
+    # Validate the model once here instead of on every request; a dummy
+    # prediction also warms up sklearn/BLAS code paths before real traffic
+    try:
+        model.predict_proba(np.zeros((1, 11), dtype=np.float32))
+        model_ready = True
+    except Exception as e:
+        model_ready = False
+        print(f"Model is not ready for predictions: {e}")
+    
+    if model_ready:
+        _warm_up(model)
+    
+    app.state.model = model if model_ready else None
+
+async def get_model(request: Request):
+    """FastAPI dependency returning the model prepared at startup
+
+    Declared async so FastAPI resolves it inline on the event loop instead
+    of handing it to the threadpool.
+    """
+    m = request.app.state.model
+    if m is None:
+        raise HTTPException(status_code=503, detail="Model not trained yet. Please train a model first.")
+    return m
+
 @app.on_event("startup")
 async def startup_event():
-    load_model()
+    # Sync endpoints run in anyio's threadpool; bound its size
+    anyio.to_thread.current_default_thread_limiter().total_tokens = PREDICT_THREADS
+    
+    # Under Gunicorn --preload the model was already prepared in the master
+    if not MODEL_PRELOAD:
+        prepare_model()
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "model_loaded": model is not None}
+    return {"status": "healthy", "model_loaded": model is not None, "model_ready": model_ready}
 
 @app.get("/metrics")
 async def metrics():
     """Prometheus metrics endpoint"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Aggregate metrics written by all worker processes
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
     return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 @app.post("/predict", response_model=PredictionResponse)
-async def predict(data: HealthData):
+def predict(data: HealthData, m=Depends(get_model)):
     """
     Predict health risk from input features
+    
+    Declared as a plain def so FastAPI runs it in the threadpool and the
+    blocking model call does not stall the event loop.
     """
-    with prediction_latency.time():
+    with _sampled_latency_timer():
         try:
-            # Convert input to numpy array
-            features = np.array([[
-                data.heart_rate,
-                data.steps,
-                data.sleep_hours,
-                data.respiratory_rate,
-                data.body_temp,
-                data.pm25,
-                data.pm10,
-                data.o3,
-                data.no2,
-                data.temperature,
-                data.humidity
-            ]])
-            
-            # Get model
-            current_model = load_model()
-            
-            # Check if model is fitted
-            if not hasattr(current_model, 'model') or not hasattr(current_model.model, 'coef_'):
-                raise HTTPException(status_code=503, detail="Model not trained yet. Please train a model first.")
+            # Write input into the reusable float32 buffer
+            features = _get_feature_buffer()
+            features[0, 0] = data.heart_rate
+            features[0, 1] = data.steps
+            features[0, 2] = data.sleep_hours
+            features[0, 3] = data.respiratory_rate
+            features[0, 4] = data.body_temp
+            features[0, 5] = data.pm25
+            features[0, 6] = data.pm10
+            features[0, 7] = data.o3
+            features[0, 8] = data.no2
+            features[0, 9] = data.temperature
+            features[0, 10] = data.humidity
             
             # Predict
-            proba = current_model.predict_proba(features)[0]
-            risk_prob = proba[1]  # Probability of high risk
+            risk_prob = predict_proba_fast(m, features)[0]  # Probability of high risk
             
             # Determine risk level
             if risk_prob < 0.3:
@@ -184,17 +371,79 @@ async def predict(data: HealthData):
             raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
 @app.post("/predict/batch")
-async def predict_batch(data_list: List[HealthData]):
+def predict_batch(data_list: List[HealthData], m=Depends(get_model)):
     """
     Batch prediction endpoint
     """
-    results = []
-    for data in data_list:
-        result = await predict(data)
-        results.append(result.dict())
+    if not data_list:
+        return {"predictions": []}
+    
+    with prediction_latency.time():
+        try:
+            # Fill one structured buffer field by field, then view it as a
+            # contiguous (N, 11) float32 matrix so the model is called once
+            records = np.empty(len(data_list), dtype=FEATURE_DTYPE)
+            for name in FEATURE_NAMES:
+                records[name] = [getattr(d, name) for d in data_list]
+            features = records.view(np.float32).reshape(-1, len(FEATURE_NAMES))
+            
+            # Predict
+            probs = predict_proba_fast(m, features)
+            
+            # Determine risk levels
+            predictions = _risk_levels(probs)
+            
+            prediction_counter.inc(len(data_list))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+    
+    results = [
+        PredictionResponse(
+            risk_score=float(p),
+            risk_probability=float(p),
+            prediction=str(label)
+        ).dict()
+        for p, label in zip(probs, predictions)
+    ]
+    return {"predictions": results}
+
+@app.post("/predict/raw")
+async def predict_raw(request: Request, m=Depends(get_model)):
+    """
+    Batch prediction for trusted internal callers
+    
+    The body is a packed little-endian float32 matrix with 11 values per
+    row in HealthData field order; per-item Pydantic validation is skipped.
+    """
+    body = await request.body()
+    row_bytes = len(FEATURE_NAMES) * 4
+    if not body or len(body) % row_bytes != 0:
+        raise HTTPException(status_code=400, detail=f"Body must be a non-empty multiple of {row_bytes} bytes")
+    features = np.frombuffer(body, dtype='<f4').reshape(-1, len(FEATURE_NAMES))
+    # NaN/Inf would yield NaN probabilities, which JSON responses reject
+    if not np.isfinite(features).all():
+        raise HTTPException(status_code=400, detail="Body must contain only finite values")
+    
+    with prediction_latency.time():
+        try:
+            probs = await anyio.to_thread.run_sync(predict_proba_fast, m, features)
+            predictions = _risk_levels(probs)
+            prediction_counter.inc(len(features))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+    
+    results = [
+        {"risk_score": p, "risk_probability": p, "prediction": label}
+        for p, label in zip(probs.tolist(), predictions.tolist())
+    ]
     return {"predictions": results}
 
+if MODEL_PRELOAD:
+    # Prepare once at import time so forked workers share the model
+    prepare_model()
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080)  # nosec B104
+    # "auto" selects uvloop/httptools when installed (see requirements.txt)
+    uvicorn.run(app, host="0.0.0.0", port=8080, loop="auto", http="auto")  # nosec B104
 
@@ -9,6 +9,7 @@ import mlflow.sklearn
 from datetime import datetime
 import argparse
 import json
+from functools import lru_cache
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -21,6 +22,26 @@ import pandas as pd
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
 DRIFT_THRESHOLD = float(os.getenv("DRIFT_THRESHOLD", "0.5"))
 
+@lru_cache(maxsize=4)
+def get_simulators(num_patients: int = 500, num_sensors: int = 20):
+    """Build the data simulators once and reuse them across drift checks"""
+    return WearableSimulator(num_patients=num_patients), EnvironmentalSimulator(num_sensors=num_sensors)
+
+def merge_env_means(health: pd.DataFrame, env: pd.DataFrame) -> pd.DataFrame:
+    """Attach per-node environmental means to single-node health data"""
+    env_means = env.drop(columns='node_id').mean(numeric_only=True).fillna(0)
+    for col, val in env_means.items():
+        health[col] = val
+    return health
+
+def frames_identical(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    """Cheap content check: same columns and identical row hashes"""
+    if a.shape != b.shape or list(a.columns) != list(b.columns):
+        return False
+    h_a = pd.util.hash_pandas_object(a, index=False).to_numpy()
+    h_b = pd.util.hash_pandas_object(b, index=False).to_numpy()
+    return bool((h_a == h_b).all())
+
 def check_drift_and_retrain(
     reference_date: str,
     current_date: str,
@@ -42,31 +63,27 @@ def check_drift_and_retrain(
     with mlflow.start_run(run_name=f"drift_check_{datetime.now().strftime('%Y%m%d_%H%M%S')}"):
         # Generate reference data
         print(f"📊 Generating reference data for {reference_date}...")
-        wear_sim = WearableSimulator(num_patients=500)
-        env_sim = EnvironmentalSimulator(num_sensors=20)
+        wear_sim, env_sim = get_simulators(num_patients=500, num_sensors=20)
         
         ref_health = wear_sim.generate_daily_data(reference_date, node_id)
         ref_env = env_sim.generate_sensor_data(node_id)
-        ref_merged = ref_health.merge(
-            ref_env.groupby('node_id').mean().reset_index(),
-            on='node_id',
-            how='left'
-        ).fillna(0)
+        ref_merged = merge_env_means(ref_health, ref_env)
         
         # Generate current data
         print(f"📊 Generating current data for {current_date}...")
         curr_health = wear_sim.generate_daily_data(current_date, node_id)
         curr_env = env_sim.generate_sensor_data(node_id)
-        curr_merged = curr_health.merge(
-            curr_env.groupby('node_id').mean().reset_index(),
-            on='node_id',
-            how='left'
-        ).fillna(0)
+        curr_merged = merge_env_means(curr_health, curr_env)
         
         # Check drift
         print("🔍 Checking for data drift...")
-        monitor = DriftMonitor(ref_merged)
-        drift_detected = monitor.check_drift(curr_merged, threshold=DRIFT_THRESHOLD)
+        if frames_identical(ref_merged, curr_merged):
+            # Identical data cannot drift; skip the per-column tests
+            print("✅ Reference and current data are identical, skipping drift report")
+            drift_detected = False
+        else:
+            monitor = DriftMonitor(ref_merged)
+            drift_detected = monitor.check_drift(curr_merged, threshold=DRIFT_THRESHOLD)
         
         mlflow.log_param("drift_threshold", DRIFT_THRESHOLD)
         mlflow.log_param("drift_detected", drift_detected)
@@ -57,6 +57,13 @@ def train_and_register_model():
     model = HealthRiskModel()
     model.fit(X, y)
     
+    # Store fitted arrays as float32 so the inference server can serve them
+    # straight from the memory-mapped artifact without casting
+    for obj, attrs in ((model.model, ('coef_', 'intercept_')), (model.scaler, ('mean_', 'scale_'))):
+        for attr in attrs:
+            if getattr(obj, attr, None) is not None:
+                setattr(obj, attr, getattr(obj, attr).astype(np.float32))
+    
     # Test prediction
     test_pred = model.predict_proba(X[:5])
     print(f"Model trained! Test predictions: {test_pred[:, 1]}")
@@ -70,7 +77,8 @@ def train_and_register_model():
         
         with tempfile.TemporaryDirectory() as tmpdir:
             model_path = os.path.join(tmpdir, "health_risk_model.pkl")
-            model.save(model_path)
+            # Uncompressed joblib dump keeps numpy arrays mmap-able at load time
+            joblib.dump(model, model_path, compress=0)
             
             # Log the full model as artifact
             mlflow.log_artifact(model_path, "model")
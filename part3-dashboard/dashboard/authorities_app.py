@@ -21,8 +21,8 @@ project_root = os.path.abspath(os.path.join(current_dir, '../..'))
 part1_path = os.path.join(project_root, 'part1-data-model')
 sys.path.insert(0, part1_path)
 
-from data_simulation.wearables import WearableSimulator
-from data_simulation.air_quality import EnvironmentalSimulator
+from common import get_wear_sim, get_env_sim, to_csv_bytes, render_alert, inject_css
+from downsampling import downsample
 
 # Page config
 st.set_page_config(
@@ -33,7 +33,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
+CSS = """
     <style>
     .main-header {
         font-size: 2.5rem;
@@ -41,88 +41,119 @@ st.markdown("""
         color: #1f77b4;
         margin-bottom: 1rem;
     }
-    .alert-box {
-        padding: 1rem;
-        border-radius: 0.5rem;
-        margin: 1rem 0;
-    }
-    .high-risk {
-        background-color: #ffebee;
-        border-left: 5px solid #f44336;
-    }
-    .medium-risk {
-        background-color: #fff3e0;
-        border-left: 5px solid #ff9800;
-    }
-    .low-risk {
-        background-color: #e8f5e9;
-        border-left: 5px solid #4caf50;
-    }
     </style>
-""", unsafe_allow_html=True)
+"""
+inject_css(CSS)
+
+# Simulate coordinates for cities (in real app, use actual coordinates)
+CITY_COORDS = {
+    'New York': {'lat': 40.7128, 'lon': -74.0060},
+    'Los Angeles': {'lat': 34.0522, 'lon': -118.2437},
+    'Chicago': {'lat': 41.8781, 'lon': -87.6298},
+    'Houston': {'lat': 29.7604, 'lon': -95.3698},
+    'Phoenix': {'lat': 33.4484, 'lon': -112.0740}
+}
+CITY_COORDS_DF = pd.DataFrame(
+    [{'city': city, 'lat': c['lat'], 'lon': c['lon']} for city, c in CITY_COORDS.items()]
+)
+
+# Map points above which markers are replaced by a density heatmap
+MAP_DENSITY_THRESHOLD = 500
 
 @st.cache_data
 def generate_authorities_data(num_nodes=5, days=7):
     """Generate aggregated health risk data for multiple nodes"""
-    wear_sim = WearableSimulator(num_patients=500)
-    env_sim = EnvironmentalSimulator(num_sensors=20)
+    wear_sim = get_wear_sim(500)
+    env_sim = get_env_sim(20)
     
     nodes = [f"hospital_{i:02d}" for i in range(1, num_nodes + 1)]
     cities = ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix']
+    node_cities = {node: cities[idx % len(cities)] for idx, node in enumerate(nodes)}
     
-    all_data = []
     current_date = datetime.now()
+    dates = [(current_date - timedelta(days=day_offset)).strftime("%Y-%m-%d") for day_offset in range(days)]
     
-    for day_offset in range(days):
-        date = (current_date - timedelta(days=day_offset)).strftime("%Y-%m-%d")
-        
-        for idx, node in enumerate(nodes):
-            # Generate health data
-            health_data = wear_sim.generate_daily_data(date, node_id=node)
-            
-            # Generate environmental data
-            env_data = env_sim.generate_sensor_data(node_id=node)
-            env_mean = env_data.groupby('node_id').mean().reset_index()
-            
-            # Merge data
-            merged = health_data.merge(env_mean, on='node_id', how='left').fillna(0)
-            
-            # Calculate aggregated metrics
-            total_patients = len(merged)
-            high_risk_count = merged['risk_score'].sum()
-            high_risk_pct = (high_risk_count / total_patients) * 100
-            
-            avg_heart_rate = merged['heart_rate'].mean()
-            avg_pm25 = merged['pm25'].mean()
-            avg_pm10 = merged['pm10'].mean()
-            avg_temp = merged['temperature'].mean()
-            
-            all_data.append({
-                'date': date,
-                'node_id': node,
-                'city': cities[idx % len(cities)],
-                'total_patients': total_patients,
-                'high_risk_count': high_risk_count,
-                'high_risk_percentage': high_risk_pct,
-                'avg_heart_rate': avg_heart_rate,
-                'avg_pm25': avg_pm25,
-                'avg_pm10': avg_pm10,
-                'avg_temperature': avg_temp,
-                'avg_o3': merged['o3'].mean(),
-                'avg_no2': merged['no2'].mean(),
-                'avg_humidity': merged['humidity'].mean()
-            })
-    
-    return pd.DataFrame(all_data)
+    # Generate health and environmental data for every (date, node) at once
+    health_data = pd.concat(
+        [wear_sim.generate_daily_data(date, node_id=node).assign(date=date) for date in dates for node in nodes],
+        copy=False, ignore_index=True
+    )
+    env_data = pd.concat(
+        [env_sim.generate_sensor_data(node_id=node).assign(date=date) for date in dates for node in nodes],
+        copy=False, ignore_index=True
+    )
+    env_mean = env_data.groupby(['date', 'node_id'], as_index=False, sort=False, observed=True).mean(numeric_only=True)
+    
+    # Merge data
+    merged = health_data.merge(env_mean, on=['date', 'node_id'], how='left').fillna(0)
+    
+    # Calculate aggregated metrics per (date, node)
+    out = merged.groupby(['date', 'node_id'], sort=False, observed=True).agg(
+        total_patients=('risk_score', 'size'),
+        high_risk_count=('risk_score', 'sum'),
+        avg_heart_rate=('heart_rate', 'mean'),
+        avg_pm25=('pm25', 'mean'),
+        avg_pm10=('pm10', 'mean'),
+        avg_temperature=('temperature', 'mean'),
+        avg_o3=('o3', 'mean'),
+        avg_no2=('no2', 'mean'),
+        avg_humidity=('humidity', 'mean')
+    ).reset_index()
+    out['city'] = pd.Categorical(out['node_id'].map(node_cities), categories=cities)
+    out['high_risk_percentage'] = out['high_risk_count'].to_numpy() / out['total_patients'].to_numpy() * 100
+    
+    # Categorical keys and datetime dates keep groupby/compare cheap downstream
+    out['node_id'] = out['node_id'].astype('category')
+    out['date'] = pd.to_datetime(out['date'])
+    
+    return out[[
+        'date', 'node_id', 'city', 'total_patients', 'high_risk_count',
+        'high_risk_percentage', 'avg_heart_rate', 'avg_pm25', 'avg_pm10',
+        'avg_temperature', 'avg_o3', 'avg_no2', 'avg_humidity'
+    ]]
 
-def get_risk_level(risk_pct):
-    """Determine risk level based on percentage"""
-    if risk_pct >= 20:
-        return "High", "🔴"
-    elif risk_pct >= 10:
-        return "Medium", "🟡"
-    else:
-        return "Low", "🟢"
+@st.cache_data
+def build_aggregates(df):
+    """Aggregate node data per (date, city) in a single groupby pass"""
+    return df.groupby(['date', 'city'], sort=False, observed=True).agg(
+        total_patients=('total_patients', 'sum'),
+        high_risk_count=('high_risk_count', 'sum'),
+        high_risk_percentage=('high_risk_percentage', 'mean'),
+        avg_pm25=('avg_pm25', 'mean'),
+        avg_pm10=('avg_pm10', 'mean')
+    ).reset_index()
+
+@st.cache_data
+def get_map_data(agg, latest_date):
+    """City aggregates for one day, joined with coordinates in one hashed merge"""
+    return agg.loc[agg['date'] == latest_date].merge(
+        CITY_COORDS_DF, on='city', how='left'
+    ).fillna({'lat': 0, 'lon': 0})
+
+@st.cache_data
+def get_trend_data(agg):
+    """Per-city risk trend, downsampled for plotting"""
+    return downsample(agg, 'date', 'high_risk_percentage', by='city')
+
+# Detailed node statistics table: column -> widget label and format
+DISPLAY_COLUMNS = {
+    'node_id': st.column_config.TextColumn('Node ID'),
+    'city': st.column_config.TextColumn('City'),
+    'total_patients': st.column_config.NumberColumn('Total Patients', format='%d'),
+    'high_risk_count': st.column_config.NumberColumn('High Risk Count', format='%d'),
+    'high_risk_percentage': st.column_config.NumberColumn('High Risk %', format='%.2f'),
+    'avg_heart_rate': st.column_config.NumberColumn('Avg Heart Rate', format='%.2f'),
+    'avg_pm25': st.column_config.NumberColumn('PM2.5', format='%.2f'),
+    'avg_pm10': st.column_config.NumberColumn('PM10', format='%.2f'),
+    'avg_temperature': st.column_config.NumberColumn('Temperature', format='%.2f')
+}
+
+def get_risk_levels(risk_pct):
+    """Determine risk levels and emojis for an array of percentages"""
+    conditions = [risk_pct >= 20, risk_pct >= 10]
+    levels = np.select(conditions, ["High", "Medium"], default="Low")
+    emojis = np.select(conditions, ["🔴", "🟡"], default="🟢")
+    return levels, emojis
 
 def main():
     st.markdown('<h1 class="main-header">🏥 Health Authorities Dashboard</h1>', unsafe_allow_html=True)
@@ -140,7 +171,8 @@ def main():
     
     # Current date data
     latest_date = df['date'].max()
-    latest_data = df[df['date'] == latest_date].copy()
+    latest_data = df.loc[df['date'] == latest_date]
+    agg = build_aggregates(df)
     
     # Alerts Section
     st.header("🚨 Active Alerts")
@@ -148,99 +180,95 @@ def main():
     high_risk_nodes = latest_data[latest_data['high_risk_percentage'] >= risk_threshold]
     
     if len(high_risk_nodes) > 0:
-        for _, row in high_risk_nodes.iterrows():
-            risk_level, emoji = get_risk_level(row['high_risk_percentage'])
-            st.markdown(f"""
-                <div class="alert-box high-risk">
-                    <h4>{emoji} Alert: {row['city']} ({row['node_id']})</h4>
-                    <p><strong>Risk Level:</strong> {risk_level} ({row['high_risk_percentage']:.1f}% high-risk patients)</p>
-                    <p><strong>High Risk Patients:</strong> {int(row['high_risk_count'])} / {int(row['total_patients'])}</p>
-                    <p><strong>Air Quality (PM2.5):</strong> {row['avg_pm25']:.2f} μg/m³</p>
-                    <p><strong>Date:</strong> {row['date']}</p>
-                </div>
-            """, unsafe_allow_html=True)
+        alert_cols = ['city', 'node_id', 'high_risk_percentage', 'high_risk_count',
+                      'total_patients', 'avg_pm25', 'date']
+        risk_levels, emojis = get_risk_levels(high_risk_nodes['high_risk_percentage'].to_numpy())
+        for (city, node_id, pct, high_risk, total, pm25, date), risk_level, emoji in zip(
+                high_risk_nodes[alert_cols].itertuples(index=False, name=None), risk_levels, emojis):
+            render_alert(
+                f"{emoji} Alert: {city} ({node_id})",
+                f"**Risk Level:** {risk_level} ({pct:.1f}% high-risk patients)  \n"
+                f"**High Risk Patients:** {int(high_risk)} / {int(total)}  \n"
+                f"**Air Quality (PM2.5):** {pm25:.2f} μg/m³  \n"
+                f"**Date:** {date:%Y-%m-%d}",
+                "high-risk"
+            )
     else:
         st.success("✅ No high-risk alerts at this time")
     
     # Key Metrics
     st.header("📊 Key Metrics Overview")
     
+    stats = latest_data.agg({
+        'total_patients': 'sum',
+        'high_risk_count': 'sum',
+        'high_risk_percentage': 'mean'
+    })
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_patients = latest_data['total_patients'].sum()
-        st.metric("Total Patients Monitored", f"{total_patients:,}")
+        st.metric("Total Patients Monitored", f"{int(stats['total_patients']):,}")
     
     with col2:
-        total_high_risk = latest_data['high_risk_count'].sum()
-        st.metric("High Risk Patients", f"{total_high_risk:,}", 
-                 delta=f"{(total_high_risk/latest_data['total_patients'].sum()*100):.1f}%")
+        st.metric("High Risk Patients", f"{int(stats['high_risk_count']):,}", 
+                 delta=f"{(stats['high_risk_count']/stats['total_patients']*100):.1f}%")
     
     with col3:
-        avg_risk_pct = latest_data['high_risk_percentage'].mean()
-        st.metric("Average Risk %", f"{avg_risk_pct:.1f}%")
+        st.metric("Average Risk %", f"{stats['high_risk_percentage']:.1f}%")
     
     with col4:
-        active_nodes = len(latest_data)
-        st.metric("Active Nodes", active_nodes)
+        st.metric("Active Nodes", len(latest_data.index))
     
     # Risk Map
     st.header("🗺️ Risk Map by Location")
     
     # Create risk map data
-    map_data = latest_data.groupby('city').agg({
-        'high_risk_percentage': 'mean',
-        'total_patients': 'sum',
-        'high_risk_count': 'sum',
-        'avg_pm25': 'mean',
-        'avg_pm10': 'mean'
-    }).reset_index()
-    
-    # Simulate coordinates for cities (in real app, use actual coordinates)
-    city_coords = {
-        'New York': {'lat': 40.7128, 'lon': -74.0060},
-        'Los Angeles': {'lat': 34.0522, 'lon': -118.2437},
-        'Chicago': {'lat': 41.8781, 'lon': -87.6298},
-        'Houston': {'lat': 29.7604, 'lon': -95.3698},
-        'Phoenix': {'lat': 33.4484, 'lon': -112.0740}
-    }
-    
-    map_data['lat'] = map_data['city'].map(lambda x: city_coords.get(x, {}).get('lat', 0))
-    map_data['lon'] = map_data['city'].map(lambda x: city_coords.get(x, {}).get('lon', 0))
-    
-    # Create map visualization
-    fig_map = px.scatter_mapbox(
-        map_data,
-        lat='lat',
-        lon='lon',
-        size='high_risk_count',
-        color='high_risk_percentage',
-        hover_name='city',
-        hover_data={
-            'high_risk_percentage': ':.1f',
-            'total_patients': ':d',
-            'avg_pm25': ':.2f'
-        },
-        color_continuous_scale='RdYlGn_r',
-        size_max=50,
-        zoom=3,
-        height=500,
-        title="Health Risk Distribution by City"
-    )
+    map_data = get_map_data(agg, latest_date)
+    
+    # Create map visualization; past a few hundred points per-marker hover
+    # stops being readable, so aggregate into a density heatmap instead
+    if len(map_data) > MAP_DENSITY_THRESHOLD:
+        fig_map = go.Figure(go.Densitymapbox(
+            lat=map_data['lat'],
+            lon=map_data['lon'],
+            z=map_data['high_risk_count'],
+            colorscale='RdYlGn_r',
+            radius=20
+        ))
+        fig_map.update_layout(
+            mapbox_center={'lat': map_data['lat'].mean(), 'lon': map_data['lon'].mean()},
+            mapbox_zoom=3,
+            height=500,
+            title="Health Risk Density"
+        )
+    else:
+        fig_map = px.scatter_mapbox(
+            map_data,
+            lat='lat',
+            lon='lon',
+            size='high_risk_count',
+            color='high_risk_percentage',
+            hover_name='city',
+            hover_data={
+                'high_risk_percentage': ':.1f',
+                'total_patients': ':d',
+                'avg_pm25': ':.2f'
+            },
+            color_continuous_scale='RdYlGn_r',
+            size_max=50,
+            zoom=3,
+            height=500,
+            title="Health Risk Distribution by City"
+        )
     fig_map.update_layout(mapbox_style="open-street-map")
     st.plotly_chart(fig_map, use_container_width=True)
     
     # Risk Trends Over Time
     st.header("📈 Risk Trends Over Time")
     
-    trend_data = df.groupby(['date', 'city']).agg({
-        'high_risk_percentage': 'mean',
-        'high_risk_count': 'sum',
-        'total_patients': 'sum'
-    }).reset_index()
-    
     fig_trend = px.line(
-        trend_data,
+        get_trend_data(agg),
         x='date',
         y='high_risk_percentage',
         color='city',
@@ -272,9 +300,11 @@ def main():
     
     with col2:
         # Air Quality Index
-        latest_data['aqi'] = (latest_data['avg_pm25'] + latest_data['avg_pm10']) / 2
+        pm25 = latest_data['avg_pm25'].to_numpy()
+        pm10 = latest_data['avg_pm10'].to_numpy()
+        aqi_data = latest_data.assign(aqi=0.5 * (pm25 + pm10))
         fig_aqi = px.bar(
-            latest_data.sort_values('aqi', ascending=False),
+            aqi_data.sort_values('aqi', ascending=False),
             x='city',
             y='aqi',
             color='high_risk_percentage',
@@ -293,20 +323,17 @@ def main():
     else:
         display_data = latest_data[latest_data['city'] == selected_city]
     
-    # Format display
-    display_cols = ['node_id', 'city', 'total_patients', 'high_risk_count', 
-                   'high_risk_percentage', 'avg_heart_rate', 'avg_pm25', 
-                   'avg_pm10', 'avg_temperature']
-    
-    display_df = display_data[display_cols].copy()
-    display_df.columns = ['Node ID', 'City', 'Total Patients', 'High Risk Count',
-                          'High Risk %', 'Avg Heart Rate', 'PM2.5', 'PM10', 'Temperature']
-    display_df = display_df.round(2)
-    
-    st.dataframe(display_df, use_container_width=True, hide_index=True)
+    # Labels and number formats are applied by the widget, not the frame
+    st.dataframe(
+        display_data,
+        use_container_width=True,
+        hide_index=True,
+        column_order=list(DISPLAY_COLUMNS),
+        column_config=DISPLAY_COLUMNS
+    )
     
     # Download button
-    csv = df.to_csv(index=False)
+    csv = to_csv_bytes(df)
     st.download_button(
         label="📥 Download Full Dataset",
         data=csv,
@@ -21,8 +21,8 @@ project_root = os.path.abspath(os.path.join(current_dir, '../..'))
 part1_path = os.path.join(project_root, 'part1-data-model')
 sys.path.insert(0, part1_path)
 
-from data_simulation.wearables import WearableSimulator
-from data_simulation.air_quality import EnvironmentalSimulator
+from common import get_wear_sim, get_env_sim, to_csv_bytes, render_alert, inject_css
+from downsampling import downsample
 
 # Page config
 st.set_page_config(
@@ -33,7 +33,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
+CSS = """
     <style>
     .main-header {
         font-size: 2.5rem;
@@ -41,24 +41,6 @@ st.markdown("""
         color: #2e7d32;
         margin-bottom: 1rem;
     }
-    .alert-box {
-        padding: 1.5rem;
-        border-radius: 0.5rem;
-        margin: 1rem 0;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    .high-risk {
-        background-color: #ffebee;
-        border-left: 5px solid #f44336;
-    }
-    .medium-risk {
-        background-color: #fff3e0;
-        border-left: 5px solid #ff9800;
-    }
-    .low-risk {
-        background-color: #e8f5e9;
-        border-left: 5px solid #4caf50;
-    }
     .info-box {
         background-color: #e3f2fd;
         border-left: 5px solid #2196f3;
@@ -73,53 +55,73 @@ st.markdown("""
         text-align: center;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+inject_css(CSS)
+
+# Simulated risk probability indexed by the 0/1 risk_score
+RISK_PROBABILITIES = np.array([0.15, 0.75])
 
 @st.cache_data
 def generate_personal_data(patient_id, days=30):
     """Generate personal health data for a specific patient"""
-    wear_sim = WearableSimulator(num_patients=1)
-    env_sim = EnvironmentalSimulator(num_sensors=1)
+    wear_sim = get_wear_sim(1)
+    env_sim = get_env_sim(1)
     
-    all_data = []
     current_date = datetime.now()
+    dates = [(current_date - timedelta(days=day_offset)).strftime("%Y-%m-%d") for day_offset in range(days)]
     
-    for day_offset in range(days):
-        date = (current_date - timedelta(days=day_offset)).strftime("%Y-%m-%d")
-        
-        # Generate health data
-        health_data = wear_sim.generate_daily_data(date, node_id="hospital_01")
-        if len(health_data) > 0:
-            patient_data = health_data.iloc[0].copy()
-            
-            # Generate environmental data
-            env_data = env_sim.generate_sensor_data(node_id="hospital_01")
-            env_mean = env_data.groupby('node_id').mean().reset_index()
-            
-            if len(env_mean) > 0:
-                # Simulate risk prediction
-                risk_score = patient_data['risk_score']
-                risk_probability = 0.15 if risk_score == 0 else 0.75
-                
-                all_data.append({
-                    'date': date,
-                    'patient_id': patient_id,
-                    'heart_rate': patient_data['heart_rate'],
-                    'steps': patient_data['steps'],
-                    'sleep_hours': patient_data['sleep_hours'],
-                    'respiratory_rate': patient_data['respiratory_rate'],
-                    'body_temp': patient_data['body_temp'],
-                    'pm25': env_mean.iloc[0]['pm25'] if len(env_mean) > 0 else 12,
-                    'pm10': env_mean.iloc[0]['pm10'] if len(env_mean) > 0 else 20,
-                    'o3': env_mean.iloc[0]['o3'] if len(env_mean) > 0 else 0.035,
-                    'no2': env_mean.iloc[0]['no2'] if len(env_mean) > 0 else 18,
-                    'temperature': env_mean.iloc[0]['temperature'] if len(env_mean) > 0 else 70,
-                    'humidity': env_mean.iloc[0]['humidity'] if len(env_mean) > 0 else 55,
-                    'risk_score': risk_score,
-                    'risk_probability': risk_probability
-                })
-    
-    return pd.DataFrame(all_data)
+    # Generate health data (first patient of each day) for all days at once
+    health_data = pd.concat(
+        [wear_sim.generate_daily_data(date, node_id="hospital_01").iloc[:1].assign(date=date) for date in dates],
+        copy=False, ignore_index=True
+    )
+    
+    # Generate environmental data
+    env_data = pd.concat(
+        [env_sim.generate_sensor_data(node_id="hospital_01").assign(date=date) for date in dates],
+        copy=False, ignore_index=True
+    )
+    env_mean = env_data.groupby('date', as_index=False, sort=False, observed=True).mean(numeric_only=True)
+    
+    df = health_data.merge(env_mean, on='date', how='left')
+    df = df.fillna({'pm25': 12, 'pm10': 20, 'o3': 0.035, 'no2': 18, 'temperature': 70, 'humidity': 55})
+    df['patient_id'] = patient_id
+    
+    # Simulate risk prediction
+    df['risk_probability'] = RISK_PROBABILITIES.take(df['risk_score'].to_numpy())
+    
+    df['patient_id'] = df['patient_id'].astype('category')
+    df['date'] = pd.to_datetime(df['date'])
+    
+    return df[[
+        'date', 'patient_id', 'heart_rate', 'steps', 'sleep_hours',
+        'respiratory_rate', 'body_temp', 'pm25', 'pm10', 'o3', 'no2',
+        'temperature', 'humidity', 'risk_score', 'risk_probability'
+    ]]
+
+# Personal alert rules: (column, condition, title, message, severity).
+# Conditions take a NumPy array so they can be evaluated for all days at once.
+ALERT_RULES = [
+    # Health alerts
+    ('heart_rate', lambda v: v > 100, "High Heart Rate",
+     "Your heart rate is {:.0f} bpm, which is above normal. Consider rest.", "high-risk"),
+    ('heart_rate', lambda v: v < 50, "Low Heart Rate",
+     "Your heart rate is {:.0f} bpm, which is below normal. Consult a doctor.", "high-risk"),
+    ('sleep_hours', lambda v: v < 6, "Insufficient Sleep",
+     "You only got {:.1f} hours of sleep. Aim for 7-9 hours.", "medium-risk"),
+    ('body_temp', lambda v: v > 99.5, "Elevated Body Temperature",
+     "Your body temperature is {:.1f}°F. Monitor for symptoms.", "medium-risk"),
+    ('steps', lambda v: v < 3000, "Low Activity",
+     "You've only taken {:.0f} steps today. Try to be more active.", "low-risk"),
+    # Environmental alerts
+    ('pm25', lambda v: v > 35, "Poor Air Quality",
+     "PM2.5 level is {:.1f} μg/m³ (unhealthy). Limit outdoor activities.", "high-risk"),
+    ('pm25', lambda v: (v > 25) & (v <= 35), "Moderate Air Quality",
+     "PM2.5 level is {:.1f} μg/m³. Sensitive individuals should take caution.", "medium-risk"),
+    # Same cut-off as the "High" level in get_risk_level
+    ('risk_probability', lambda v: v >= 0.7, "High Health Risk",
+     "Your current health metrics indicate elevated risk. Please consult with healthcare provider.", "high-risk"),
+]
 
 def get_risk_level(risk_prob):
     """Determine risk level based on probability"""
@@ -208,7 +210,7 @@ def main():
     with col3:
         st.markdown(f"""
             <div class="metric-card">
-                <h2 style="margin:0; color: #ff9800;">{latest['date']}</h2>
+                <h2 style="margin:0; color: #ff9800;">{latest['date']:%Y-%m-%d}</h2>
                 <p style="margin:0; color: #666;">Last Updated</p>
             </div>
         """, unsafe_allow_html=True)
@@ -216,40 +218,18 @@ def main():
     # Personal Alerts
     st.header("🔔 Personal Alerts")
     
-    alerts = []
-    
-    # Health alerts
-    if latest['heart_rate'] > 100:
-        alerts.append(("High Heart Rate", f"Your heart rate is {latest['heart_rate']:.0f} bpm, which is above normal. Consider rest.", "high-risk"))
-    elif latest['heart_rate'] < 50:
-        alerts.append(("Low Heart Rate", f"Your heart rate is {latest['heart_rate']:.0f} bpm, which is below normal. Consult a doctor.", "high-risk"))
-    
-    if latest['sleep_hours'] < 6:
-        alerts.append(("Insufficient Sleep", f"You only got {latest['sleep_hours']:.1f} hours of sleep. Aim for 7-9 hours.", "medium-risk"))
-    
-    if latest['body_temp'] > 99.5:
-        alerts.append(("Elevated Body Temperature", f"Your body temperature is {latest['body_temp']:.1f}°F. Monitor for symptoms.", "medium-risk"))
-    
-    if latest['steps'] < 3000:
-        alerts.append(("Low Activity", f"You've only taken {latest['steps']:.0f} steps today. Try to be more active.", "low-risk"))
-    
-    # Environmental alerts
-    if latest['pm25'] > 35:
-        alerts.append(("Poor Air Quality", f"PM2.5 level is {latest['pm25']:.1f} μg/m³ (unhealthy). Limit outdoor activities.", "high-risk"))
-    elif latest['pm25'] > 25:
-        alerts.append(("Moderate Air Quality", f"PM2.5 level is {latest['pm25']:.1f} μg/m³. Sensitive individuals should take caution.", "medium-risk"))
-    
-    if risk_level == "High":
-        alerts.append(("High Health Risk", "Your current health metrics indicate elevated risk. Please consult with healthcare provider.", "high-risk"))
+    # Evaluate every rule over the whole history in one vectorized pass
+    alert_masks = np.column_stack([condition(df[col].to_numpy()) for col, condition, *_ in ALERT_RULES])
+    alerts = [
+        (title, message.format(latest[col]), alert_class)
+        for (col, _, title, message, alert_class), fired in zip(ALERT_RULES, alert_masks[-1])
+        if fired
+    ]
     
     if alerts:
-        for title, message, alert_class in alerts:
-            st.markdown(f"""
-                <div class="alert-box {alert_class}">
-                    <h4>{title}</h4>
-                    <p>{message}</p>
-                </div>
-            """, unsafe_allow_html=True)
+        for title, message, severity in alerts:
+            render_alert(title, message, severity)
+        st.caption(f"Alerts were active on {int(alert_masks.any(axis=1).sum())} of the last {len(df)} days")
     else:
         st.success("✅ No active alerts. Your health metrics look good!")
     
@@ -261,7 +241,7 @@ def main():
     with col1:
         # Heart Rate Trend
         fig_hr = px.line(
-            df,
+            downsample(df, 'date', 'heart_rate'),
             x='date',
             y='heart_rate',
             title="Heart Rate Trend",
@@ -293,7 +273,7 @@ def main():
     with col2:
         # Steps Trend
         fig_steps = px.line(
-            df,
+            downsample(df, 'date', 'steps'),
             x='date',
             y='steps',
             title="Daily Steps",
@@ -308,7 +288,7 @@ def main():
         
         # Risk Probability Trend
         fig_risk = px.area(
-            df,
+            downsample(df, 'date', 'risk_probability'),
             x='date',
             y='risk_probability',
             title="Health Risk Probability Trend",
@@ -325,27 +305,27 @@ def main():
     # Health Metrics Overview
     st.header("💪 Health Metrics Overview")
     
+    metric_cols = ['heart_rate', 'steps', 'sleep_hours', 'body_temp']
+    means = df[metric_cols].mean()
+    deltas = latest[metric_cols].astype(float) - means
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        avg_hr = df['heart_rate'].mean()
-        st.metric("Avg Heart Rate", f"{avg_hr:.0f} bpm", 
-                 delta=f"{latest['heart_rate'] - avg_hr:.0f}")
+        st.metric("Avg Heart Rate", f"{means['heart_rate']:.0f} bpm", 
+                 delta=f"{deltas['heart_rate']:.0f}")
     
     with col2:
-        avg_steps = df['steps'].mean()
-        st.metric("Avg Daily Steps", f"{avg_steps:.0f}", 
-                 delta=f"{latest['steps'] - avg_steps:.0f}")
+        st.metric("Avg Daily Steps", f"{means['steps']:.0f}", 
+                 delta=f"{deltas['steps']:.0f}")
     
     with col3:
-        avg_sleep = df['sleep_hours'].mean()
-        st.metric("Avg Sleep Hours", f"{avg_sleep:.1f} hrs", 
-                 delta=f"{latest['sleep_hours'] - avg_sleep:.1f}")
+        st.metric("Avg Sleep Hours", f"{means['sleep_hours']:.1f} hrs", 
+                 delta=f"{deltas['sleep_hours']:.1f}")
     
     with col4:
-        avg_temp = df['body_temp'].mean()
-        st.metric("Avg Body Temp", f"{avg_temp:.1f}°F", 
-                 delta=f"{latest['body_temp'] - avg_temp:.1f}")
+        st.metric("Avg Body Temp", f"{means['body_temp']:.1f}°F", 
+                 delta=f"{deltas['body_temp']:.1f}")
     
     # Environmental Factors
     st.header("🌍 Environmental Factors")
@@ -355,7 +335,7 @@ def main():
     with col1:
         # Air Quality Trend
         fig_aq = px.line(
-            df,
+            downsample(df, 'date', ['pm25', 'pm10']),
             x='date',
             y=['pm25', 'pm10'],
             title="Air Quality (PM2.5 & PM10)",
@@ -367,17 +347,18 @@ def main():
     
     with col2:
         # Weather Factors
+        weather_data = downsample(df, 'date', ['temperature', 'humidity'])
         fig_weather = go.Figure()
         fig_weather.add_trace(go.Scatter(
-            x=df['date'],
-            y=df['temperature'],
+            x=weather_data['date'],
+            y=weather_data['temperature'],
             name='Temperature',
             yaxis='y',
             line=dict(color='red')
         ))
         fig_weather.add_trace(go.Scatter(
-            x=df['date'],
-            y=df['humidity'],
+            x=weather_data['date'],
+            y=weather_data['humidity'],
             name='Humidity',
             yaxis='y2',
             line=dict(color='blue')
@@ -402,7 +383,7 @@ def main():
     # Download Data
     st.header("📥 Download Your Data")
     
-    csv = df.to_csv(index=False)
+    csv = to_csv_bytes(df)
     st.download_button(
         label="Download Health Data (CSV)",
         data=csv,
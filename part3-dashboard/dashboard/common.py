@@ -0,0 +1,45 @@
+"""
+Shared dashboard helpers
+Cached simulators, CSV export, alert cards and CSS injection used by both apps
+"""
+import streamlit as st
+
+# The apps put part1-data-model on sys.path before importing this module
+from data_simulation.wearables import WearableSimulator
+from data_simulation.air_quality import EnvironmentalSimulator
+
+# Native Streamlit alert element per alert severity
+ALERT_RENDERERS = {'high-risk': st.error, 'medium-risk': st.warning, 'low-risk': st.info}
+
+
+@st.cache_resource
+def get_wear_sim(num_patients):
+    """Shared WearableSimulator, built once per patient count"""
+    return WearableSimulator(num_patients=num_patients)
+
+
+@st.cache_resource
+def get_env_sim(num_sensors):
+    """Shared EnvironmentalSimulator, built once per sensor count"""
+    return EnvironmentalSimulator(num_sensors=num_sensors)
+
+
+@st.cache_data
+def to_csv_bytes(df):
+    """CSV export of a frame, cached so reruns don't reformat it"""
+    return df.to_csv(index=False).encode()
+
+
+def render_alert(title, body, severity):
+    """Render an alert card with Streamlit's native alert elements"""
+    ALERT_RENDERERS[severity](f"**{title}**\n\n{body}")
+
+
+def inject_css(css):
+    """Emit an app's <style> block
+
+    Called on every rerun with the same module-level string: Streamlit
+    drops elements a rerun does not emit, and an unchanged element makes
+    the frontend diff a no-op.
+    """
+    st.markdown(css, unsafe_allow_html=True)
@@ -0,0 +1,64 @@
+"""
+Plot downsampling
+Largest-Triangle-Three-Buckets (LTTB) reduction for line charts
+"""
+import numpy as np
+
+# Points kept per trace once a series is downsampled
+MAX_POINTS = 2000
+
+
+def lttb_indices(x, y, n_out):
+    """Indices of the n_out points LTTB keeps from (x, y), in x order"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket i (for the n_out - 2 inner points) spans edges[i]:edges[i + 1];
+    # the first and last points are always kept
+    every = (n - 2) / (n_out - 2)
+    edges = np.append(np.floor(np.arange(n_out - 1) * every).astype(np.intp) + 1, n)
+
+    idx = np.empty(n_out, dtype=np.intp)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        avg_x = x[end:edges[i + 2]].mean()
+        avg_y = y[end:edges[i + 2]].mean()
+        # Twice the area of the triangle (point a, candidate, next bucket average)
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
+
+def downsample(df, x, y, by=None, max_points=MAX_POINTS):
+    """Reduce each (by-group) series to at most max_points rows with LTTB
+
+    Frames already within budget are returned as-is. y may be a column or a
+    list of columns; with several, the rows kept for any of them are kept.
+    """
+    if len(df) <= max_points:
+        return df
+    y_cols = [y] if isinstance(y, str) else list(y)
+
+    groups = df.groupby(by, sort=False, observed=True) if by is not None else [(None, df)]
+    keep = []
+    for _, group in groups:
+        if len(group) <= max_points:
+            keep.append(group.index.to_numpy())
+            continue
+        group = group.sort_values(x)
+        xs = group[x].to_numpy()
+        if np.issubdtype(xs.dtype, np.datetime64):
+            xs = xs.view(np.int64)
+        xs = xs.astype(float)
+        rows = np.unique(np.concatenate([
+            lttb_indices(xs, group[col].to_numpy(dtype=float), max_points) for col in y_cols
+        ]))
+        keep.append(group.index.to_numpy()[rows])
+    return df.loc[np.concatenate(keep)]